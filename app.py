@@ -1,10 +1,8 @@
+import io
 import streamlit as st
 import pandas as pd
-import networkx as nx
-from pyvis.network import Network
+import numpy as np
 import streamlit.components.v1 as components
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 # --- 1. CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(
@@ -18,56 +16,122 @@ st.title('Visualizador de Enlazado Interno')
 st.markdown("Sube tu archivo CSV para analizar la estructura de enlaces. La herramienta se adapta a un número variable de columnas de enlaces.")
 
 # --- 3. FUNCIÓN DE PROCESAMIENTO (CORREGIDA) ---
-def process_data(uploaded_file):
+# Streamlit vuelve a ejecutar el script en cada interacción; las funciones
+# pesadas se cachean para no repetir el trabajo con el mismo archivo
+@st.cache_data(show_spinner=False)
+def process_data(file_bytes):
     """
     Lee y procesa el CSV con estructura de columnas intercaladas y variables.
+    Recibe el contenido del archivo en bytes para que sirva de clave de caché.
     """
-    df = pd.read_csv(uploaded_file)
-    
-    links_list = []
-    
-    # La primera columna siempre es la URL de origen
-    source_col_name = df.columns[0]
-    
-    # Itera sobre cada fila del DataFrame
-    for index, row in df.iterrows():
-        source_url = row[source_col_name]
-        
-        # Itera sobre el resto de las columnas en pares (URL, Ancla)
-        # Empieza en la columna 1 y avanza de 2 en 2
-        for i in range(1, len(df.columns), 2):
-            # Asegurarse de que hay un par completo (URL, Ancla)
-            if i + 1 < len(df.columns):
-                url_col_name = df.columns[i]
-                anchor_col_name = df.columns[i+1]
-                
-                target_url = row[url_col_name]
-                anchor_text = row[anchor_col_name]
-                
-                # Solo añade el enlace si la URL de destino existe
-                if pd.notna(target_url) and str(target_url).strip() != '':
-                    links_list.append({
-                        'Source': source_url,
-                        'Target': target_url,
-                        'Anchor_Text': anchor_text
-                    })
-                    
-    # Crea el DataFrame final a partir de la lista
-    df_links = pd.DataFrame(links_list)
-    
-    # Limpieza de espacios en blanco
-    df_links['Source'] = df_links['Source'].astype(str).str.strip()
-    df_links['Target'] = df_links['Target'].astype(str).str.strip()
-    
+    # Todas las columnas son URL o textos de ancla: se leen como texto en lugar
+    # de dejar que pandas infiera los tipos. El lector C admite filas con menos
+    # columnas (se rellenan con NaN) y cabeceras repetidas
+    df = pd.read_csv(io.BytesIO(file_bytes), dtype=str, engine='c')
+
+    # La primera columna siempre es la URL de origen; el resto van en pares
+    # (URL, Ancla) empezando en la columna 1. Si la última columna queda sin
+    # pareja se descarta. Se seleccionan por posición, no por nombre
+    n_pairs = (len(df.columns) - 1) // 2
+    sources = df.iloc[:, 0]
+    urls = df.iloc[:, 1:1 + 2 * n_pairs:2]
+    anchors = df.iloc[:, 2:2 + 2 * n_pairs:2]
+
+    # Limpieza de espacios en blanco sobre el formato ancho, antes de aplanar
+    sources = sources.str.strip()
+    urls = urls.apply(lambda col: col.str.strip())
+
+    # Pasa de formato ancho a largo: una fila por cada enlace.
+    # Los pares ya están alineados por posición, así que basta con aplanar
+    # las columnas fila a fila (mismo orden que el recorrido original)
+    df_links = pd.DataFrame({
+        'Source': np.repeat(sources.to_numpy(), n_pairs),
+        'Target': urls.to_numpy().ravel(),
+        'Anchor_Text': anchors.to_numpy().ravel(),
+    })
+
+    # Solo se conservan los enlaces con URL de origen y cuya URL de destino existe
+    # (los valores ya vienen sin espacios, basta con descartar los vacíos y los
+    # marcadores de celda vacía que algunas versiones de pandas dejan como texto)
+    missing = ['', 'nan', 'None']
+    mask = (
+        df_links['Source'].notna() & ~df_links['Source'].isin(missing)
+        & df_links['Target'].notna() & ~df_links['Target'].isin(missing)
+    )
+    df_links = df_links.loc[mask].reset_index(drop=True)
+
     return df_links
 
+@st.cache_data(show_spinner=False)
+def build_graph_data(df_links, top_k):
+    """
+    Calcula los nodos (con tamaño y tooltip según sus enlaces entrantes) y las
+    aristas del mapa de red directamente desde el DataFrame de enlaces.
+    Solo se incluyen las top_k páginas más enlazadas y los enlaces entre ellas.
+    Cada URL se representa con un entero y solo se usa el texto en etiquetas
+    y tooltips.
+    """
+    n_links = len(df_links)
+    codes, uniques = pd.factorize(pd.concat([df_links['Source'], df_links['Target']], ignore_index=True))
+    source_codes, target_codes = codes[:n_links], codes[n_links:]
+
+    # Aristas únicas (igual que en un grafo dirigido) sobre los códigos enteros;
+    # el grado de entrada se calcula sobre el grafo completo
+    edge_codes = np.unique(np.column_stack([source_codes, target_codes]), axis=0)
+    in_degree = np.bincount(edge_codes[:, 1], minlength=len(uniques))
+
+    # Páginas más enlazadas (mismo criterio que el gráfico de barras) y solo
+    # las aristas con ambos extremos entre ellas
+    link_counts = np.bincount(target_codes, minlength=len(uniques))
+    top_codes = np.argsort(-link_counts, kind='stable')[:top_k]
+    is_top = np.zeros(len(uniques), dtype=bool)
+    is_top[top_codes] = True
+    edge_codes = edge_codes[is_top[edge_codes[:, 0]] & is_top[edge_codes[:, 1]]]
+
+    urls = uniques[top_codes].tolist()
+    degrees = in_degree[top_codes].tolist()
+    sizes = [10 + degree * 3 for degree in degrees]
+    titles = [f"{url}<br>Enlaces entrantes: {degree}" for url, degree in zip(urls, degrees)]
+
+    return top_codes.tolist(), urls, sizes, titles, edge_codes.tolist()
+
+@st.cache_data(show_spinner=False)
+def build_link_counts(df_links):
+    """
+    Devuelve las 20 URL de destino con más enlaces entrantes.
+    """
+    return df_links['Target'].value_counts().nlargest(20)
+
+@st.cache_data(show_spinner=False)
+def make_bar_png(link_counts):
+    """
+    Dibuja el gráfico de barras de las páginas más enlazadas y lo devuelve
+    como imagen PNG en bytes.
+    """
+    # Importación diferida: no se paga su coste al arrancar, solo la primera vez que hay que dibujar el gráfico
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+    sns.barplot(x=link_counts.values, y=link_counts.index, ax=ax, palette='viridis')
+    ax.set_title('Top 20 Páginas con más Enlaces Entrantes', fontsize=16)
+    ax.set_xlabel('Cantidad de Enlaces Entrantes', fontsize=12)
+    ax.set_ylabel('URL de Destino', fontsize=12)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
 # --- 4. CARGADOR DE ARCHIVOS ---
 uploaded_file = st.file_uploader("📂 Sube tu archivo CSV aquí", type="csv")
 
 # --- 5. LÓGICA PRINCIPAL Y VISUALIZACIONES ---
 if uploaded_file is not None:
     try:
-        df_links = process_data(uploaded_file)
+        df_links = process_data(uploaded_file.getvalue())
 
         if df_links.empty:
             st.warning("No se encontraron enlaces válidos en el archivo. Revisa que el formato sea el correcto.")
@@ -81,37 +145,48 @@ if uploaded_file is not None:
                 st.header('Mapa de Red de Enlaces Internos')
                 st.markdown("Cada punto es una página. Las líneas son los enlaces. **Puedes hacer zoom, mover los nodos y pasar el cursor sobre ellos**.")
 
-                G = nx.from_pandas_edgelist(df_links, 'Source', 'Target', create_using=nx.DiGraph())
-                net = Network(height='750px', width='100%', bgcolor='#222222', font_color='white', notebook=True, directed=True)
-                net.from_nx(G)
+                # Con grafos muy grandes el navegador se bloquea: solo se dibujan las
+                # páginas más enlazadas y los enlaces entre ellas
+                top_k = st.slider('Nodos a mostrar', 50, 2000, 500)
+                nodes, labels, sizes, titles, edges = build_graph_data(df_links, top_k)
 
-                in_degree = dict(G.in_degree)
-                for node in net.nodes:
-                    degree = in_degree.get(node['id'], 0)
-                    node['size'] = 10 + degree * 3
-                    node['title'] = f"{node['id']}<br>Enlaces entrantes: {degree}"
+                from pyvis.network import Network
+                net = Network(height='750px', width='100%', bgcolor='#222222', font_color='white', notebook=False, directed=True, cdn_resources='remote')
+                net.add_nodes(nodes, label=labels, size=sizes, title=titles)
+                net.add_edges(edges)
 
-                net.save_graph('network_graph.html')
-                with open('network_graph.html', 'r', encoding='utf-8') as f:
-                    html_content = f.read()
+                # La simulación física solo se usa para calcular la distribución inicial:
+                # al terminar la estabilización (ajustes por defecto de pyvis/vis-network)
+                # se desactiva para que el navegador no siga animando el grafo
+                # (los nodos se pueden seguir arrastrando)
+                html_content = net.generate_html(notebook=False)
+                html_content = html_content.replace('</body>', """
+                <script type="text/javascript">
+                    network.once("stabilizationIterationsDone", function() {
+                        network.setOptions({physics: {enabled: false}});
+                    });
+                </script>
+                </body>""")
                 components.html(html_content, height=800, scrolling=True)
 
             # Pestaña 2: Gráfico de Barras
             with tab2:
                 st.header("URL con más Páginas Enlazadas")
-                link_counts = df_links['Target'].value_counts().nlargest(20)
-
-                fig, ax = plt.subplots(figsize=(12, 10))
-                sns.barplot(x=link_counts.values, y=link_counts.index, ax=ax, palette='viridis')
-                ax.set_title('Top 20 Páginas con más Enlaces Entrantes', fontsize=16)
-                ax.set_xlabel('Cantidad de Enlaces Entrantes', fontsize=12)
-                ax.set_ylabel('URL de Destino', fontsize=12)
-                st.pyplot(fig)
+                link_counts = build_link_counts(df_links)
+                st.image(make_bar_png(link_counts), use_container_width=True)
 
             # Pestaña 3: Tabla de datos
             with tab3:
                 st.header("Todos los Enlaces Detectados")
-                st.dataframe(df_links, use_container_width=True)
+
+                # Para listados grandes solo se envía al navegador un bloque de filas
+                page_size = 5000
+                if len(df_links) > page_size:
+                    start = st.slider('Fila inicial', 0, len(df_links) - page_size, 0)
+                    st.caption(f"Mostrando filas {start + 1} a {start + page_size} de {len(df_links)}.")
+                    st.dataframe(df_links.iloc[start:start + page_size], use_container_width=True)
+                else:
+                    st.dataframe(df_links, use_container_width=True)
 
     except Exception as e:
         st.error(f"❌ Ocurrió un error al procesar el archivo: {e}")